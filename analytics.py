@@ -0,0 +1,107 @@
+"""Hourly like rollups behind trending warbles and engagement stats.
+
+Reads go to message_like_rollups only; the likes table is touched just by
+`backfill`.
+"""
+from datetime import datetime, timedelta
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from models import db, Message, MessageLikeRollup, likes
+
+rollups = MessageLikeRollup.__table__
+
+
+def hour_of(ts):
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+def window_start(hours):
+    """Start of the bucket `hours` ago.
+
+    Windows are made of whole hourly buckets, so a 24 hour window covers the
+    current partial hour plus the 24 before it.
+    """
+    return hour_of(datetime.utcnow() - timedelta(hours=hours))
+
+
+def record_like(msg, delta, at=None):
+    """Add delta (1 for a like, -1 for an unlike) to msg's current hour.
+
+    Runs in the caller's transaction; the caller commits.
+    """
+    stmt = insert(rollups).values(
+        message_id=msg.id,
+        hour=hour_of(at or datetime.utcnow()),
+        author_id=msg.user_id,
+        likes=delta,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[rollups.c.message_id, rollups.c.hour],
+        set_={"likes": rollups.c.likes + delta},
+    )
+    db.session.execute(stmt)
+
+
+def trending(hours=24, limit=20):
+    """Most-liked messages over the last `hours`, as (message_id, author_id, likes) rows."""
+    total = func.sum(MessageLikeRollup.likes).label("likes")
+    return (db.session.query(MessageLikeRollup.message_id, MessageLikeRollup.author_id, total)
+            .filter(MessageLikeRollup.hour >= window_start(hours))
+            .group_by(MessageLikeRollup.message_id, MessageLikeRollup.author_id)
+            .having(total > 0)
+            .order_by(total.desc(), MessageLikeRollup.message_id.desc())
+            .limit(limit)
+            .all())
+
+
+def user_engagement(user_id, hours=None):
+    """Likes a user's messages received, overall or over the last `hours`.
+
+    Only messages with a net positive count in the window are counted, so
+    unlikes never push the totals below zero.
+    """
+    per_message = (db.session.query(MessageLikeRollup.message_id,
+                                    func.sum(MessageLikeRollup.likes).label("likes"))
+                   .filter(MessageLikeRollup.author_id == user_id))
+    if hours:
+        per_message = per_message.filter(MessageLikeRollup.hour >= window_start(hours))
+    per_message = per_message.group_by(MessageLikeRollup.message_id).subquery()
+
+    total, messages = (db.session.query(func.coalesce(func.sum(per_message.c.likes), 0),
+                                        func.count())
+                       .filter(per_message.c.likes > 0)
+                       .one())
+    return {"user_id": user_id, "likes": int(total), "messages_liked": messages}
+
+
+def backfill():
+    """Fill in the likes the rollups are missing, such as those from before deploy.
+
+    For each message, whatever `likes` holds beyond the sum of its rollups
+    goes into the hour the message was posted (likes aren't timestamped).
+    Live buckets are left alone and reruns write nothing new. Returns the
+    number of rollup rows written.
+    """
+    liked = (select([likes.c.message_id, func.count().label("likes")])
+             .group_by(likes.c.message_id)
+             .alias("liked"))
+    tracked = (select([rollups.c.message_id, func.sum(rollups.c.likes).label("likes")])
+               .group_by(rollups.c.message_id)
+               .alias("tracked"))
+    missing = func.coalesce(liked.c.likes, 0) - func.coalesce(tracked.c.likes, 0)
+    messages = Message.__table__
+    source = (select([messages.c.id, func.date_trunc("hour", messages.c.timestamp),
+                      messages.c.user_id, missing])
+              .select_from(messages
+                           .outerjoin(liked, liked.c.message_id == messages.c.id)
+                           .outerjoin(tracked, tracked.c.message_id == messages.c.id))
+              .where(missing != 0))
+
+    stmt = insert(rollups).from_select(["message_id", "hour", "author_id", "likes"], source)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[rollups.c.message_id, rollups.c.hour],
+        set_={"likes": rollups.c.likes + stmt.excluded.likes},
+    )
+    result = db.session.execute(stmt)
+    db.session.commit()
+    return result.rowcount
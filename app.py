@@ -1,9 +1,12 @@
 import os
+import click
 from flask import Flask, render_template, request, flash, redirect, session, g, abort, jsonify
 from models import db, connect_db, User, Message, likes
 from forms import SignupForm, LoginForm, MessageForm, EditProfileForm
 from sqlalchemy.exc import IntegrityError
 from flask_wtf.csrf import CSRFProtect, generate_csrf
+from ratelimit import RateLimiter
+import analytics
 
 CURR_USER_KEY = "curr_user"
 
@@ -14,8 +17,10 @@ app.config['SECRET_KEY'] = os.environ.get("SECRET_KEY", "dev-secret")  # <--
 app.config['WTF_CSRF_ENABLED'] = True
 
 csrf = CSRFProtect()
+limiter = RateLimiter()
 connect_db(app)
 csrf.init_app(app)
+limiter.init_app(app)
 
 def inject_csrf():
     return dict(csrf_token=generate_csrf)
@@ -39,6 +44,7 @@ def do_logout():
 # User routes
 
 @app.route('/signup', methods=["GET", "POST"])
+@limiter.limit("signup")
 def signup():
     if g.user:
         return redirect(f"/users/{g.user.id}")
@@ -61,6 +67,7 @@ def signup():
     return render_template('users/signup.html', form=form)
 
 @app.route('/login', methods=["GET", "POST"])
+@limiter.limit("login")
 def login():
     if g.user:
         return redirect(f"/users/{g.user.id}")
@@ -146,6 +153,7 @@ def stop_following(user_id):
 # Likes routes
 
 @app.route("/messages/<int:msg_id>/like", methods=["POST"])
+@limiter.limit("toggle_like")
 def toggle_like(msg_id):
     if not g.user:
         flash("Access unauthorized.", "danger")
@@ -158,8 +166,10 @@ def toggle_like(msg_id):
 
     if msg in g.user.liked_messages:
         g.user.liked_messages.remove(msg)
+        analytics.record_like(msg, -1)
     else:
         g.user.liked_messages.append(msg)
+        analytics.record_like(msg, 1)
 
     db.session.commit()
     if request.is_json:  # optional AJAX path
@@ -176,10 +186,45 @@ def user_likes(user_id):
             .all())
     return render_template("users/likes.html", user=user, messages=msgs)
 
+def window_hours(default=24):
+    """?hours= for analytics views, kept within a week."""
+    hours = request.args.get("hours", default, type=int)
+    if hours is None:
+        return None
+    return min(max(hours, 1), 24 * 7)
+
+@app.route("/users/<int:user_id>/engagement")
+def user_engagement(user_id):
+    user = User.query.get_or_404(user_id)
+    return jsonify(analytics.user_engagement(user.id, window_hours(default=None)))
+
+##############################################################################
+# Trending
+
+@app.route("/trending")
+def trending():
+    hours = window_hours()
+    rows = analytics.trending(hours)
+    ids = [r.message_id for r in rows]
+    by_id = {m.id: m for m in Message.query.filter(Message.id.in_(ids))} if ids else {}
+    entries = [(by_id[r.message_id], r.likes) for r in rows if r.message_id in by_id]
+    return render_template("trending.html", entries=entries, hours=hours)
+
+@app.route("/api/trending")
+def trending_json():
+    hours = window_hours()
+    rows = analytics.trending(hours)
+    return jsonify({
+        "hours": hours,
+        "messages": [{"message_id": r.message_id, "user_id": r.author_id, "likes": int(r.likes)}
+                     for r in rows],
+    })
+
 ##############################################################################
 # Message routes
 
 @app.route("/messages/new", methods=["GET", "POST"])
+@limiter.limit("messages_add")
 def messages_add():
     if not g.user:
         flash("Access unauthorized.", "danger")
@@ -227,6 +272,15 @@ def homepage():
                 .all())
     return render_template("home.html", messages=messages)
 
+##############################################################################
+# CLI
+
+@app.cli.command("backfill-analytics")
+def backfill_analytics():
+    """Add likes missing from the rollups, e.g. ones from before deploy."""
+    rows = analytics.backfill()
+    click.echo(f"Wrote {rows} rollup rows.")
+
 
 
 ##############################################################################
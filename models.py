@@ -87,6 +87,19 @@ class Message(db.Model):
     timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="cascade"), nullable=False)
 
+
+class MessageLikeRollup(db.Model):
+    """Net likes a message picked up in one hour. Maintained by analytics.py."""
+
+    __tablename__ = "message_like_rollups"
+
+    message_id = db.Column(db.Integer, db.ForeignKey("messages.id", ondelete="cascade"), primary_key=True)
+    hour = db.Column(db.DateTime, primary_key=True)
+    author_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="cascade"), nullable=False, index=True)
+    likes = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (db.Index("ix_message_like_rollups_hour", "hour"),)
+
 ##############################################################################
 # Helper functions
 
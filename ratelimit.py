@@ -0,0 +1,153 @@
+"""Token-bucket rate limiting for Warbler's write endpoints."""
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, g, request, jsonify
+
+# limits are (requests, per_seconds); a bucket holds up to `requests` tokens
+# and refills at requests / per_seconds tokens a second. Scopes key buckets
+# by logged-in user, by the username a form submits (per client IP), or by
+# client IP.
+SCOPES = ("user", "username", "ip")
+
+DEFAULT_LIMITS = {
+    "login": {"username": (5, 300), "ip": (10, 60)},
+    "signup": {"ip": (5, 300)},
+    "messages_add": {"user": (30, 60), "ip": (60, 60)},
+    "toggle_like": {"user": (60, 60), "ip": (120, 60)},
+}
+
+##############################################################################
+# Stores
+
+class RateLimitStore:
+    """Where bucket state lives.
+
+    Subclass this to share buckets between worker processes (e.g. Redis).
+    `consume` must check and spend its buckets atomically.
+    """
+
+    def consume(self, buckets, now):
+        """Take a token from every (key, capacity, rate) in `buckets`, or none.
+
+        Return 0 if allowed, else seconds until every bucket has a token.
+        """
+        raise NotImplementedError
+
+
+class MemoryStore(RateLimitStore):
+    """Per-process store. Fine for one worker; use a shared store for more.
+
+    Holds at most `max_keys` buckets, evicting the least recently used.
+    """
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, buckets, now):
+        with self._lock:
+            wait = 0
+            refilled = []
+            for key, capacity, rate in buckets:
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    tokens = capacity
+                else:
+                    tokens, stamp = bucket
+                    tokens = min(capacity, tokens + (now - stamp) * rate)
+                if tokens < 1:
+                    wait = max(wait, (1 - tokens) / rate)
+                refilled.append((key, tokens))
+
+            # a denied request spends nothing, so it can't drain other buckets
+            spend = 0 if wait else 1
+            for key, tokens in refilled:
+                if key in self._buckets:
+                    self._buckets.move_to_end(key)
+                elif len(self._buckets) >= self.max_keys:
+                    self._buckets.popitem(last=False)
+                self._buckets[key] = (tokens - spend, now)
+            return wait
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+##############################################################################
+# Limiter
+
+class RateLimiter:
+    """Per-endpoint token buckets keyed by user, submitted username and client IP."""
+
+    def __init__(self, app=None, store=None):
+        self.store = store or MemoryStore()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("RATELIMIT_ENABLED", True)
+        app.config.setdefault("RATELIMITS", DEFAULT_LIMITS)
+
+    def check(self, name):
+        """Spend a token from each bucket of `name`. Return seconds to wait, or 0.
+
+        Nothing is spent unless every bucket allows the request, so a client
+        over one limit can't drain the buckets it shares with others.
+        """
+        limits = current_app.config["RATELIMITS"].get(name)
+        if not limits:
+            return 0
+
+        buckets = []
+        for scope in SCOPES:
+            if scope not in limits:
+                continue
+            ident = self.identify(scope)
+            if ident is None:
+                continue
+            count, per = limits[scope]
+            buckets.append((f"{name}:{scope}:{ident}", count, count / per))
+        return self.store.consume(buckets, time.time()) if buckets else 0
+
+    @staticmethod
+    def identify(scope):
+        """Key for `scope` in this request, or None if it doesn't apply."""
+        if scope == "user":
+            user = g.get("user")
+            return user.id if user is not None else None
+        if scope == "username":
+            # paired with the IP so nobody can lock an account out for others
+            username = request.form.get("username")
+            return f"{username}@{request.remote_addr}" if username else None
+        return request.remote_addr
+
+    def limit(self, name, methods=("POST",)):
+        """Decorate a view so `methods` requests to it are rate limited."""
+        def decorator(view):
+            @wraps(view)
+            def wrapped(*args, **kwargs):
+                if request.method in methods and current_app.config["RATELIMIT_ENABLED"]:
+                    wait = self.check(name)
+                    if wait:
+                        return too_many_requests(wait)
+                return view(*args, **kwargs)
+            return wrapped
+        return decorator
+
+
+def too_many_requests(wait):
+    """429 response telling the client how long to back off."""
+    retry_after = max(1, math.ceil(wait))
+    if request.is_json:
+        resp = jsonify({"error": "rate_limited", "retry_after": retry_after})
+    else:
+        resp = current_app.make_response(
+            f"Too many requests. Try again in {retry_after} seconds.")
+    resp.status_code = 429
+    resp.headers["Retry-After"] = str(retry_after)
+    return resp
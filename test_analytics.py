@@ -0,0 +1,115 @@
+"""Analytics rollup tests."""
+
+# run these tests like:
+#
+#    python -m unittest test_analytics.py
+
+from datetime import datetime, timedelta
+from testing import DBTestCase, make_user, make_message, make_like
+from app import CURR_USER_KEY
+from models import MessageLikeRollup
+import analytics
+
+
+class AnalyticsTestCase(DBTestCase):
+    def setUp(self):
+        super().setUp()
+        self.u1 = make_user("u1")
+        self.u2 = make_user("u2")
+        self.m1 = make_message(self.u2, text="first")
+        self.m2 = make_message(self.u2, text="second")
+
+    def login(self, user_id):
+        with self.client.session_transaction() as sess:
+            sess[CURR_USER_KEY] = user_id
+
+    def test_like_toggle_updates_rollup(self):
+        self.login(self.u1.id)
+        self.client.post(f"/messages/{self.m1.id}/like")
+        self.assertEqual(analytics.trending()[0].message_id, self.m1.id)
+
+        self.client.post(f"/messages/{self.m1.id}/like")
+        self.assertEqual(analytics.trending(), [])
+
+    def test_trending_orders_and_windows(self):
+        now = datetime.utcnow()
+        analytics.record_like(self.m1, 1, at=now)
+        analytics.record_like(self.m2, 1, at=now)
+        analytics.record_like(self.m2, 1, at=now)
+        analytics.record_like(self.m1, 5, at=now - timedelta(days=3))
+
+        self.assertEqual([r.message_id for r in analytics.trending(24)], [self.m2.id, self.m1.id])
+        self.assertEqual(analytics.trending(24 * 7)[0].message_id, self.m1.id)
+
+    def test_user_engagement(self):
+        analytics.record_like(self.m1, 1)
+        analytics.record_like(self.m2, 1)
+        stats = analytics.user_engagement(self.u2.id)
+        self.assertEqual(stats["likes"], 2)
+        self.assertEqual(stats["messages_liked"], 2)
+
+    def test_user_engagement_ignores_unliked(self):
+        analytics.record_like(self.m1, 1)
+        analytics.record_like(self.m1, -1)
+        stats = analytics.user_engagement(self.u2.id)
+        self.assertEqual(stats["likes"], 0)
+        self.assertEqual(stats["messages_liked"], 0)
+
+    def test_user_engagement_window_never_negative(self):
+        analytics.record_like(self.m1, 1, at=datetime.utcnow() - timedelta(days=3))
+        analytics.record_like(self.m1, -1)
+        stats = analytics.user_engagement(self.u2.id, hours=24)
+        self.assertEqual(stats["likes"], 0)
+        self.assertEqual(stats["messages_liked"], 0)
+
+    def test_user_engagement_view(self):
+        analytics.record_like(self.m1, 1)
+        resp = self.client.get(f"/users/{self.u2.id}/engagement")
+        self.assertEqual(resp.json["likes"], 1)
+
+        # out of range windows are clamped, not a 500
+        resp = self.client.get(f"/users/{self.u2.id}/engagement?hours=100000000")
+        self.assertEqual(resp.status_code, 200)
+        resp = self.client.get(f"/users/{self.u2.id}/engagement?hours=-5")
+        self.assertEqual(resp.json["likes"], 1)
+
+    def test_backfill(self):
+        make_like(self.u1, self.m1)
+        self.assertEqual(analytics.backfill(), 1)
+        row = MessageLikeRollup.query.one()
+        self.assertEqual((row.message_id, row.author_id, row.likes), (self.m1.id, self.u2.id, 1))
+        self.assertEqual(row.hour, analytics.hour_of(self.m1.timestamp))
+
+    def test_backfill_adds_history_to_live_rollups(self):
+        posted = datetime.utcnow() - timedelta(days=3)
+        old = make_message(self.u2, text="old", timestamp=posted)
+        make_like(self.u1, old)
+        # liked after deploy: both in likes and recorded live
+        make_like(make_user("u3"), old)
+        analytics.record_like(old, 1)
+
+        self.assertEqual(analytics.backfill(), 1)
+        self.assertEqual(analytics.user_engagement(self.u2.id)["likes"], 2)
+        rows = {r.hour: r.likes for r in MessageLikeRollup.query.filter_by(message_id=old.id)}
+        self.assertEqual(rows, {analytics.hour_of(posted): 1,
+                                analytics.hour_of(datetime.utcnow()): 1})
+
+        self.assertEqual(analytics.backfill(), 0)
+        self.assertEqual(analytics.user_engagement(self.u2.id)["likes"], 2)
+
+    def test_backfill_after_live_unlike(self):
+        # an old like, removed after deploy, leaves the rollups at -1
+        analytics.record_like(self.m1, -1)
+        analytics.backfill()
+        stats = analytics.user_engagement(self.u2.id)
+        self.assertEqual(stats["likes"], 0)
+        self.assertEqual(stats["messages_liked"], 0)
+
+    def test_trending_views(self):
+        analytics.record_like(self.m1, 1)
+        resp = self.client.get("/trending")
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn(b"first", resp.data)
+
+        resp = self.client.get("/api/trending")
+        self.assertEqual(resp.json["messages"][0]["message_id"], self.m1.id)
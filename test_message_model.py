@@ -1,22 +1,17 @@
-import os
-os.environ['DATABASE_URL'] = "postgresql:///warbler_test"
+"""Message model tests."""
 
-from unittest import TestCase
-from app import app
-from models import db, User, Message
+# run these tests like:
+#
+#    python -m unittest test_message_model.py
 
-app.config['WTF_CSRF_ENABLED'] = False
+from testing import DBTestCase, make_user
+from models import db, Message
 
-class MessageModelTestCase(TestCase):
-    def setUp(self):
-        db.drop_all()
-        db.create_all()
-        u = User.signup("u", "u@test.com", "password", None)
-        db.session.commit()
-        self.u = u
 
-    def tearDown(self):
-        db.session.rollback()
+class MessageModelTestCase(DBTestCase):
+    def setUp(self):
+        super().setUp()
+        self.u = make_user("u")
 
     def test_message_make(self):
         m = Message(text="a"*140, user_id=self.u.id)
@@ -28,4 +23,4 @@ class MessageModelTestCase(TestCase):
         m = Message(text="a"*141, user_id=self.u.id)
         db.session.add(m)
         with self.assertRaises(Exception):
-            db.session.commit()
\ No newline at end of file
+            db.session.commit()
@@ -4,30 +4,15 @@
 #
 #    FLASK_ENV=production python -m unittest test_message_views.py
 
-import os
-os.environ['DATABASE_URL'] = "postgresql:///warbler_test"
+from testing import DBTestCase, make_user, make_message
+from app import CURR_USER_KEY
+from models import Message
 
-from unittest import TestCase
-from app import app, CURR_USER_KEY
-from models import db, User, Message
 
-# Don't have WTForms use CSRF at all, since it's a pain to test
-
-app.config['WTF_CSRF_ENABLED'] = False
-
-
-class MessageViewsTestCase(TestCase):
+class MessageViewsTestCase(DBTestCase):
     def setUp(self):
-        db.drop_all()
-        db.create_all()
-        self.client = app.test_client()
-
-        u = User.signup("u", "u@test.com", "password", None)
-        db.session.commit()
-        self.u = u
-
-    def tearDown(self):
-        db.session.rollback()
+        super().setUp()
+        self.u = make_user("u")
 
     def login(self):
         with self.client.session_transaction() as sess:
@@ -45,13 +30,9 @@ class MessageViewsTestCase(TestCase):
         self.assertIsNone(Message.query.get(m.id))
 
     def test_cannot_delete_others_message(self):
-        # create other user + message
-        u2 = User.signup("u2", "u2@test.com", "password", None)
-        db.session.commit()
-        m2 = Message(text="yo", user_id=u2.id)
-        db.session.add(m2); db.session.commit()
+        m2 = make_message(make_user("u2"), text="yo")
 
         self.login()
         resp = self.client.post(f"/messages/{m2.id}/delete", follow_redirects=True)
         self.assertIn(b"only delete your own", resp.data)
-        self.assertIsNotNone(Message.query.get(m2.id))
\ No newline at end of file
+        self.assertIsNotNone(Message.query.get(m2.id))
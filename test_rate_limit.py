@@ -0,0 +1,102 @@
+"""Rate limiter tests."""
+
+# run these tests like:
+#
+#    python -m unittest test_rate_limit.py
+
+from unittest import TestCase
+from testing import app
+from app import limiter
+from ratelimit import MemoryStore
+
+
+class MemoryStoreTestCase(TestCase):
+    def test_burst_then_refill(self):
+        store = MemoryStore()
+        # 2 tokens, refilling one a second
+        self.assertEqual(store.consume([("k", 2, 1.0)], 100.0), 0)
+        self.assertEqual(store.consume([("k", 2, 1.0)], 100.0), 0)
+        self.assertAlmostEqual(store.consume([("k", 2, 1.0)], 100.0), 1.0)
+        self.assertEqual(store.consume([("k", 2, 1.0)], 101.0), 0)
+
+    def test_keys_are_independent(self):
+        store = MemoryStore()
+        store.consume([("a", 1, 1.0)], 0.0)
+        self.assertTrue(store.consume([("a", 1, 1.0)], 0.0))
+        self.assertEqual(store.consume([("b", 1, 1.0)], 0.0), 0)
+
+    def test_all_or_nothing(self):
+        store = MemoryStore()
+        store.consume([("b", 1, 1.0)], 0.0)
+        self.assertTrue(store.consume([("a", 1, 1.0), ("b", 1, 1.0)], 0.0))
+        # "b" denied the request, so "a" kept its token
+        self.assertEqual(store.consume([("a", 1, 1.0)], 0.0), 0)
+
+    def test_evicts_least_recently_used(self):
+        store = MemoryStore(max_keys=2)
+        store.consume([("a", 1, 1.0)], 0.0)
+        store.consume([("b", 1, 1.0)], 0.0)
+        store.consume([("a", 1, 1.0)], 0.0)
+        # nothing has refilled yet; "b" is evicted as the oldest touched
+        store.consume([("c", 1, 1.0)], 0.0)
+        self.assertEqual(list(store._buckets), ["a", "c"])
+        store.consume([("d", 1, 1.0)], 0.0)
+        self.assertEqual(list(store._buckets), ["c", "d"])
+
+
+class RateLimitViewsTestCase(TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+        self.limits = app.config['RATELIMITS']
+        app.config['RATELIMITS'] = {"login": {"ip": (2, 60)}}
+        app.config['RATELIMIT_ENABLED'] = True
+        limiter.store.reset()
+
+    def tearDown(self):
+        app.config['RATELIMITS'] = self.limits
+        app.config['RATELIMIT_ENABLED'] = False
+        limiter.store.reset()
+
+    def test_login_throttled(self):
+        for _ in range(2):
+            resp = self.client.post("/login", data={})
+            self.assertEqual(resp.status_code, 200)
+
+        resp = self.client.post("/login", data={})
+        self.assertEqual(resp.status_code, 429)
+        self.assertGreaterEqual(int(resp.headers["Retry-After"]), 1)
+
+    def test_get_not_throttled(self):
+        for _ in range(3):
+            resp = self.client.get("/login")
+            self.assertEqual(resp.status_code, 200)
+
+    def test_login_throttled_by_username(self):
+        app.config['RATELIMITS'] = {"login": {"username": (1, 60), "ip": (2, 60)}}
+        resp = self.client.post("/login", data={"username": "bob"})
+        self.assertEqual(resp.status_code, 200)
+        resp = self.client.post("/login", data={"username": "bob"})
+        self.assertEqual(resp.status_code, 429)
+
+        # bob's rejected attempt didn't spend the shared IP bucket
+        resp = self.client.post("/login", data={"username": "alice"})
+        self.assertEqual(resp.status_code, 200)
+
+    def test_throttled_ip_cannot_lock_out_username(self):
+        app.config['RATELIMITS'] = {"login": {"username": (1, 60), "ip": (1, 60)}}
+        attacker = {"REMOTE_ADDR": "10.0.0.1"}
+        resp = self.client.post("/login", data={"username": "junk"}, environ_base=attacker)
+        self.assertEqual(resp.status_code, 200)
+        resp = self.client.post("/login", data={"username": "victim"}, environ_base=attacker)
+        self.assertEqual(resp.status_code, 429)
+
+        resp = self.client.post("/login", data={"username": "victim"},
+                                environ_base={"REMOTE_ADDR": "10.0.0.2"})
+        self.assertEqual(resp.status_code, 200)
+
+    def test_username_limit_is_per_ip(self):
+        app.config['RATELIMITS'] = {"login": {"username": (1, 60)}}
+        for addr in ("10.0.0.1", "10.0.0.2"):
+            resp = self.client.post("/login", data={"username": "victim"},
+                                    environ_base={"REMOTE_ADDR": addr})
+            self.assertEqual(resp.status_code, 200)
@@ -4,45 +4,21 @@
 #
 #    python -m unittest test_user_model.py
 
-import os
-os.environ['DATABASE_URL'] = "postgresql:///warbler_test"
+from testing import DBTestCase, make_user, make_message
+from models import db, User
 
-from unittest import TestCase
-from app import app
-from models import db, User, Message
 
-
-# BEFORE we import our app, let's set an environmental variable
-# to use a different database for tests (we need to do this
-# before we import our app, since that will have already
-# connected to the database
-
-app.config['WTF_CSRF_ENABLED'] = False
-
-
-# Now we can import app
-
-
-
-# Create our tables (we do this here, so we only create the tables
-# once for all tests --- in each test, we'll delete the data
-# and create fresh new clean test data
-
-
-class UserModelTestCase(TestCase):
+class UserModelTestCase(DBTestCase):
     def setUp(self):
-        db.drop_all()
-        db.create_all()
-        u1 = User.signup("u1", "u1@test.com", "password", None)
-        u2 = User.signup("u2", "u2@test.com", "password", None)
-        db.session.commit()
-        self.u1 = u1
-        self.u2 = u2
-
-    def tearDown(self):
-        db.session.rollback()
+        super().setUp()
+        self.u1 = make_user("u1")
+        self.u2 = make_user("u2")
 
     def test_signup_and_authenticate(self):
+        u = User.signup("u3", "u3@test.com", "password", None)
+        db.session.commit()
+        self.assertEqual(User.authenticate("u3", "password").id, u.id)
+
         u = User.authenticate("u1", "password")
         self.assertTrue(u)
         self.assertEqual(u.id, self.u1.id)
@@ -56,10 +32,8 @@ class UserModelTestCase(TestCase):
         self.assertTrue(self.u2.is_followed_by(self.u1))
 
     def test_likes_relationship(self):
-        m = Message(text="hi", user_id=self.u2.id)
-        db.session.add(m)
-        db.session.commit()
+        m = make_message(self.u2, text="hi")
         self.u1.liked_messages.append(m)
         db.session.commit()
         self.assertIn(m, self.u1.liked_messages)
-        self.assertIn(self.u1, m.liked_by)
\ No newline at end of file
+        self.assertIn(self.u1, m.liked_by)
@@ -1,31 +1,20 @@
-import os
-os.environ['DATABASE_URL'] = "postgresql:///warbler_test"
+"""User View tests."""
 
-from unittest import TestCase
-from app import app, CURR_USER_KEY
-from models import db, User, Message
+# run these tests like:
+#
+#    python -m unittest test_user_views.py
 
-app.config['WTF_CSRF_ENABLED'] = False
+from testing import DBTestCase, make_user, make_message
+from app import CURR_USER_KEY
+from models import User
 
-class UserViewsTestCase(TestCase):
-    def setUp(self):
-        db.drop_all()
-        db.create_all()
-        self.client = app.test_client()
-
-        u1 = User.signup("u1", "u1@test.com", "password", None)
-        u2 = User.signup("u2", "u2@test.com", "password", None)
-        db.session.commit()
-        self.u1 = u1
-        self.u2 = u2
 
-        m2 = Message(text="hello", user_id=u2.id)
-        db.session.add(m2)
-        db.session.commit()
-        self.m2 = m2
-
-    def tearDown(self):
-        db.session.rollback()
+class UserViewsTestCase(DBTestCase):
+    def setUp(self):
+        super().setUp()
+        self.u1 = make_user("u1")
+        self.u2 = make_user("u2")
+        self.m2 = make_message(self.u2, text="hello")
 
     def login(self, user_id):
         with self.client.session_transaction() as sess:
@@ -0,0 +1,147 @@
+"""Shared test setup: one schema per worker, one savepoint per test.
+
+Import this before `app` in test modules, since it picks the database:
+
+    from testing import DBTestCase, make_user, make_message
+
+Each pytest-xdist worker (PYTEST_XDIST_WORKER=gw0, gw1, ...) gets its own
+database, e.g. warbler_test_gw0, created on first use.
+"""
+import os
+from itertools import count
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine.url import make_url
+
+
+def worker_url(base, worker):
+    """`base` with the worker's suffix on its database name."""
+    url = make_url(base)
+    if worker:
+        url.database = f"{url.database}_{worker}"
+    return str(url)
+
+
+DATABASE_URL = worker_url(os.environ.get("TEST_DATABASE_URL", "postgresql:///warbler_test"),
+                          os.environ.get("PYTEST_XDIST_WORKER"))
+os.environ['DATABASE_URL'] = DATABASE_URL
+
+from unittest import TestCase
+from app import app
+from models import db, bcrypt, User, Message
+
+app.config['WTF_CSRF_ENABLED'] = False
+app.config['RATELIMIT_ENABLED'] = False
+
+##############################################################################
+# Database
+
+_schema_ready = False
+
+
+def create_database(url=DATABASE_URL):
+    """CREATE DATABASE for `url` if it isn't there yet."""
+    url = make_url(url)
+    name = url.database
+    url.database = "postgres"
+    engine = create_engine(url, isolation_level="AUTOCOMMIT")
+    with engine.connect() as conn:
+        exists = conn.execute(
+            text("SELECT 1 FROM pg_database WHERE datname = :name"), name=name).scalar()
+        if not exists:
+            conn.execute(f'CREATE DATABASE "{name}"')
+    engine.dispose()
+
+
+def create_schema():
+    """Build the tables once per process; tests never commit past their savepoint."""
+    global _schema_ready
+    if _schema_ready:
+        return
+    create_database()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    _schema_ready = True
+
+
+def _restart_savepoint(session, transaction):
+    # app code commits and rolls back freely; each time that ends our
+    # savepoint, open a new one so the outer transaction stays untouched
+    if transaction.nested and not transaction._parent.nested:
+        session.expire_all()
+        session.begin_nested()
+
+
+class DBTestCase(TestCase):
+    """Runs each test inside a transaction that is rolled back afterward.
+
+    An app context stays pushed for the whole test, so requests made with
+    `self.client` share the test's session and its objects stay attached.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        create_schema()
+
+    def setUp(self):
+        self.ctx = app.app_context()
+        self.ctx.push()
+
+        self.connection = db.engine.connect()
+        self.transaction = self.connection.begin()
+        self.app_session = db.session
+        db.session = db.create_scoped_session(options={"bind": self.connection, "binds": {}})
+        event.listen(db.session, "after_transaction_end", _restart_savepoint)
+        db.session.begin_nested()
+
+        self.client = app.test_client()
+
+    def tearDown(self):
+        db.session.remove()
+        db.session = self.app_session
+        self.transaction.rollback()
+        self.connection.close()
+        self.ctx.pop()
+
+##############################################################################
+# Factories
+
+_seq = count(1)
+_hashes = {}
+
+
+def _hash(password):
+    # bcrypt is most of the cost of making a user; hash each password once
+    if password not in _hashes:
+        _hashes[password] = bcrypt.generate_password_hash(password).decode("utf8")
+    return _hashes[password]
+
+
+def make_user(username=None, email=None, password="password", **kwargs):
+    """Add a user that `User.authenticate(username, password)` accepts."""
+    username = username or f"user{next(_seq)}"
+    u = User(username=username,
+             email=email or f"{username}@test.com",
+             password=_hash(password),
+             **kwargs)
+    db.session.add(u)
+    db.session.flush()
+    return u
+
+
+def make_message(user=None, text="hello", **kwargs):
+    m = Message(text=text, user_id=(user or make_user()).id, **kwargs)
+    db.session.add(m)
+    db.session.flush()
+    return m
+
+
+def make_follow(follower, followed):
+    follower.following.append(followed)
+    db.session.flush()
+
+
+def make_like(user, message):
+    user.liked_messages.append(message)
+    db.session.flush()